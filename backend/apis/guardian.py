@@ -5,7 +5,14 @@ from const import *
 from bs4 import BeautifulSoup 
 import re
 
-def fetch_guardian_articles():
+def fetch_guardian_pages():
+    """
+    Fetches recent articles from The Guardian API without parsing their HTML.
+
+    Returns:
+        list: Raw pages with 'html' (the article body HTML as decoded by the API), 'description_html', 'title',
+              'url', 'publishedAt' and 'source'. Pass each to parse_guardian_article.
+    """
 
     if GUARDIAN_API_KEY: # Only proceed if key exists
         guardian_params = {
@@ -23,48 +30,17 @@ def fetch_guardian_articles():
             results = guardian_data.get('response', {}).get('results', [])
             print(f"Successfully fetched {len(results)} articles from The Guardian.")
             
-            formatted_results = []
+            raw_pages = []
             for result_item in results: # Renamed 'results' to 'result_item' to avoid conflict
-                raw_html_content = result_item.get('fields', {}).get('body')
-                clean_text_content = ""
-
-                if raw_html_content:
-                    # Use BeautifulSoup to parse the HTML and extract text
-                    soup = BeautifulSoup(raw_html_content, 'html.parser')
-                    # Find common tags that contain main article text, e.g., <p> tags
-                    paragraphs = soup.find_all('p')
-                    clean_text_content = "\n".join([p.get_text() for p in paragraphs])
-                    
-                    # Fallback or additional cleaning: if no paragraphs, try getting all text
-                    if not clean_text_content.strip():
-                        clean_text_content = soup.get_text(separator='\n', strip=True)
-                
-                # If still no content from body, fallback to trailText
-                if not clean_text_content.strip():
-                    clean_text_content = result_item.get('fields', {}).get('trailText', '')
-
-                raw_html_description = result_item.get('fields', {}).get('trailText')
-
-                if raw_html_description:
-                    soup = BeautifulSoup(raw_html_description, 'html.parser')
-                    text_without_html = soup.get_text()
-                    clean_text_description = re.sub(r'^(Editorial|Guardian view):\s*', '', text_without_html, flags=re.IGNORECASE).strip()
-
-                formatted_results.append({
+                raw_pages.append({
+                    "html": result_item.get('fields', {}).get('body') or '',
+                    "description_html": result_item.get('fields', {}).get('trailText') or '',
                     "title": result_item.get('webTitle'),
-                    "description": clean_text_description,
-                    "content": clean_text_content, # Now this will be clean plain text
                     "source": "The Guardian",
                     "url": result_item.get('webUrl'),
                     "publishedAt": result_item.get('webPublicationDate')
                 })
-            
-            # Print sample to verify clean content
-            # if formatted_results:
-            #     print(f"Sample Guardian article content (after cleaning):")
-            #     print(formatted_results[0].get('content')[:500] + "...") # Print first 500 chars
-
-            return formatted_results
+            return raw_pages
 
         except requests.exceptions.RequestException as e:
             logging.error(f"HTTP Error fetching from The Guardian: {e}")
@@ -78,6 +54,59 @@ def fetch_guardian_articles():
             logging.error(f"Unexpected error with The Guardian fetch: {e}")
     return [] # Ensure an empty list is returned if API key is missing or an error occurs
 
+def parse_guardian_article(page):
+    """
+    Extracts clean text content and description from a raw page returned by fetch_guardian_pages.
+    CPU-bound and free of shared state, so it is safe to run in a process pool.
+    """
+    raw_html_content = page["html"]
+    clean_text_content = ""
+
+    if raw_html_content:
+        # Use BeautifulSoup to parse the HTML and extract text
+        soup = BeautifulSoup(raw_html_content, 'html.parser')
+        # Find common tags that contain main article text, e.g., <p> tags
+        paragraphs = soup.find_all('p')
+        clean_text_content = "\n".join([p.get_text() for p in paragraphs])
+        
+        # Fallback or additional cleaning: if no paragraphs, try getting all text
+        if not clean_text_content.strip():
+            clean_text_content = soup.get_text(separator='\n', strip=True)
+    
+    # If still no content from body, fallback to trailText
+    if not clean_text_content.strip():
+        clean_text_content = page["description_html"]
+
+    clean_text_description = ""
+    raw_html_description = page["description_html"]
+
+    if raw_html_description:
+        soup = BeautifulSoup(raw_html_description, 'html.parser')
+        text_without_html = soup.get_text()
+        clean_text_description = re.sub(r'^(Editorial|Guardian view):\s*', '', text_without_html, flags=re.IGNORECASE).strip()
+
+    return {
+        "title": page["title"],
+        "description": clean_text_description,
+        "content": clean_text_content, # Now this will be clean plain text
+        "source": page["source"],
+        "url": page["url"],
+        "publishedAt": page["publishedAt"]
+    }
+
+def fetch_guardian_articles():
+    """
+    Fetches and parses recent Guardian articles sequentially.
+    The pipeline uses fetch_guardian_pages and parse_guardian_article directly to parse in parallel.
+    """
+    formatted_results = []
+    for page in fetch_guardian_pages():
+        try:
+            formatted_results.append(parse_guardian_article(page))
+        except Exception as e:
+            logging.error(f"Error parsing Guardian article {page['url']}: {e}")
+    return formatted_results
+
 # When testing this function directly:
 if __name__ == '__main__':
     # Ensure your const.py has PUBLISHED_FROM_DATE and MARKET_SEARCH_QUERY
@@ -2,11 +2,17 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import openai
 import numpy as np
+import os
 import json
 import logging
 import asyncio
-from apis.guardian import fetch_guardian_articles
-from scraping.semianalysis import scrape_semianalysis_articles
+from apis.guardian import fetch_guardian_pages, parse_guardian_article
+from scraping.semianalysis import fetch_semianalysis_pages, parse_semianalysis_article
+from pipeline.parse_pool import fetch_and_parse
+from storage.topic_archive import TopicArchive
+from storage.article_store import ArticleStore
+from jobs.job_queue import JobQueue
+from datetime import datetime
 import hashlib
 import random
 
@@ -26,6 +32,9 @@ except Exception as e:
 app = Flask(__name__)
 CORS(app)
 
+topic_archive = TopicArchive()
+article_store = ArticleStore()
+
 async def classify_sector_and_topic(article_title, article_description, existing_topics_in_sector):
     """
     Classifies an article into a market sector, identifies its topic, and ranks its importance.
@@ -131,12 +140,53 @@ async def summarize_content(texts):
         logging.error(f"Error summarizing content: {e}")
         return f"Summary could not be generated due to an error."
 
+async def embed_texts(texts):
+    """
+    Embeds a list of texts using the OpenAI Embeddings API. Returns a (len(texts), EMBEDDING_DIM) float32 array,
+    or None if the request fails.
+    """
+    try:
+        # OpenAI client methods are synchronous, not async
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+    except Exception as e:
+        logging.error(f"Error embedding {len(texts)} texts: {e}")
+        return None
+
+async def link_topics_to_archive(final_content_output):
+    """
+    Links today's topics to earlier coverage in the topic archive and records them for future runs.
+    Each topic gains a 'topicId' and a 'threadId' shared by every topic covering the same ongoing story.
+    """
+    archived_topics = []
+    for sector_name, sector_content in final_content_output.items():
+        for topic in sector_content['topics']:
+            archived_topics.append((sector_name, topic))
+
+    if not archived_topics:
+        return
+
+    vectors = await embed_texts([f"{topic['name']}: {topic['description']}" for _, topic in archived_topics])
+    if vectors is None:
+        logging.warning("Skipping topic archive linking because embeddings could not be generated.")
+        return
+
+    entries = topic_archive.link_and_append(
+        [{**topic, "sector": sector_name} for sector_name, topic in archived_topics],
+        vectors,
+        datetime.now().strftime("%Y-%m-%d")
+    )
+    for (_, topic), entry in zip(archived_topics, entries):
+        topic["topicId"] = entry["topic_id"]
+        topic["threadId"] = entry["thread_id"]
+
 
 async def fetch_and_store_news():
     logging.info("Starting fetch_and_store_news...")
-    # guardian_articles = await asyncio.to_thread(fetch_guardian_articles)
-    semianalysis_articles = await asyncio.to_thread(scrape_semianalysis_articles)
-    articles = semianalysis_articles
+    articles = await fetch_and_parse([
+        # (fetch_guardian_pages, parse_guardian_article),
+        (fetch_semianalysis_pages, parse_semianalysis_article),
+    ])
     
     hashed_articles = {}
     for article in articles:
@@ -144,25 +194,48 @@ async def fetch_and_store_news():
         article_hash = hashlib.sha256(article_hash_input.encode('utf-8')).hexdigest()
         hashed_articles[article_hash] = article
     
-    with open("hashed_articles.json", "w", encoding='utf-8') as f:
-        json.dump(hashed_articles, f, indent=4, ensure_ascii=False)
-    logging.info(f"Finished fetch_and_store_news. Stored {len(hashed_articles)} unique articles.")
+    article_store.add_articles(hashed_articles)
+    article_store.compact()
+    # Only the hashes of this run's articles are kept outside the store; metadata and content are looked up by hash.
+    with open("run_articles.json", "w", encoding='utf-8') as f:
+        json.dump(list(hashed_articles), f)
+    logging.info(f"Finished fetch_and_store_news. Fetched {len(hashed_articles)} unique articles.")
+    return hashed_articles
+
+
+def add_to_sector_topic_map(sector_topic_map, sector, topic_name, topic_importance, article_hash):
+    if sector not in sector_topic_map:
+        sector_topic_map[sector] = {}
+
+    if topic_name not in sector_topic_map[sector]:
+        sector_topic_map[sector][topic_name] = {
+            "hashes": [],
+            "importance": [],
+            "description": ""
+        }
+    
+    sector_topic_map[sector][topic_name]["hashes"].append(article_hash)
+    sector_topic_map[sector][topic_name]["importance"].append(topic_importance)
 
 
 async def sort_by_sector_and_topic():
     logging.info("Starting sort_by_sector_and_topic...")
     try:
-        with open("hashed_articles.json", "r", encoding='utf-8') as f:
-            hashed_articles = json.load(f)
+        with open("run_articles.json", "r", encoding='utf-8') as f:
+            run_article_hashes = json.load(f)
     except FileNotFoundError:
-        logging.error("hashed_articles.json not found. Run fetch_and_store_news first.")
+        logging.error("run_articles.json not found. Run fetch_and_store_news first.")
         return
 
-    logging.info(f"Processing {len(hashed_articles)} articles for classification and topic grouping...")
+    logging.info(f"Processing {len(run_article_hashes)} articles for classification and topic grouping...")
     
     sector_topic_map = {sector: {} for sector in MARKET_SECTORS}
 
-    for article_hash, article_content in hashed_articles.items():
+    for article_hash in run_article_hashes:
+        article_content = article_store.get_metadata(article_hash)
+        if article_content is None:
+            logging.warning(f"Article {article_hash} missing from article store. Skipping.")
+            continue
         article_title = article_content.get("title", "No Title")
         article_description = article_content.get("description", "No Description")
         
@@ -188,18 +261,7 @@ async def sort_by_sector_and_topic():
 
             logging.info(f"Article '{article_title}' classified as '{sector}' with topic '{topic_name}' and importance '{topic_importance}'.")
 
-            if sector not in sector_topic_map:
-                sector_topic_map[sector] = {}
-
-            if topic_name not in sector_topic_map[sector]:
-                sector_topic_map[sector][topic_name] = {
-                    "hashes": [],
-                    "importance": [],
-                    "description": ""
-                }
-            
-            sector_topic_map[sector][topic_name]["hashes"].append(article_hash)
-            sector_topic_map[sector][topic_name]["importance"].append(topic_importance)
+            add_to_sector_topic_map(sector_topic_map, sector, topic_name, topic_importance, article_hash)
 
         except Exception as e:
             logging.error(f"Error classifying or grouping article '{article_title}': {e}")
@@ -207,55 +269,50 @@ async def sort_by_sector_and_topic():
 
     with open("sector_topic_map.json", "w", encoding='utf-8') as f:
         json.dump(sector_topic_map, f, indent=4, ensure_ascii=False)
-    logging.info(f"Finished sort_by_sector_and_topic. Processed {len(hashed_articles)} articles.")
-
+    logging.info(f"Finished sort_by_sector_and_topic. Processed {len(run_article_hashes)} articles.")
 
-async def summarize_sector_topic_map():
-    logging.info("Starting summarize_sector_topic_map...")
-    try:
-        with open("sector_topic_map.json", "r", encoding='utf-8') as f:
-            sector_topic_map = json.load(f)
-        with open("hashed_articles.json", "r", encoding='utf-8') as f:
-            hashed_articles = json.load(f)
-    except FileNotFoundError:
-        logging.error("sector_topic_map.json or hashed_articles.json not found. Run previous steps first.")
-        return
 
-    final_content_output = {sector: {'landingSummary': '', 'topics': []} for sector in MARKET_SECTORS}
+async def summarize_topic(sector_name, topic_name, topic_info, store):
+    """
+    Summarizes the articles grouped under one topic. Returns the topic entry for full_content.json,
+    or None if none of its articles are in the store. Only this topic's article bodies are read from the store.
+    """
+    topic_articles = {h: store.get_metadata(h) for h in topic_info["hashes"] if h in store}
 
-    for sector_name, topics_in_sector in sector_topic_map.items():
-        if not topics_in_sector:
-            continue
+    combined_texts_for_topic = []
+    for article_hash in topic_articles:
+        combined_texts_for_topic.append(store.get_content(article_hash))
+    
+    if not combined_texts_for_topic:
+        logging.warning(f"No valid content for topic '{topic_name}' in sector '{sector_name}'. Skipping.")
+        return None
 
+    last_article_content = topic_articles[list(topic_articles)[-1]]
 
-        sorted_topics_list = []
-        for topic_name, topic_info in topics_in_sector.items():
-            combined_texts_for_topic = []
-            for article_hash in topic_info["hashes"]:
-                article_data = hashed_articles.get(article_hash)
-                if article_data:
-                    combined_texts_for_topic.append(article_data.get('content'))
-            
-            if not combined_texts_for_topic:
-                logging.warning(f"No valid content for topic '{topic_name}' in sector '{sector_name}'. Skipping.")
-                continue
+    in_depth_summary = await summarize_content(combined_texts_for_topic)
+    
+    avg_importance = np.mean(topic_info["importance"]) if topic_info["importance"] else 1
 
-            last_article_hash = topic_info["hashes"][-1]
-            last_article_content = hashed_articles[last_article_hash]
+    return {
+        "name": topic_name,
+        "description": last_article_content["description"],
+        "summary": in_depth_summary,
+        "sources": [article["source"] for article in topic_articles.values()],
+        "urls": [article["url"] for article in topic_articles.values()],
+        "importance": float(avg_importance)
+    }
 
-            in_depth_summary = await summarize_content(combined_texts_for_topic)
-            
-            avg_importance = np.mean(topic_info["importance"]) if topic_info["importance"] else 1
 
-            sorted_topics_list.append({
-                "name": topic_name,
-                "description": last_article_content["description"],
-                "summary": in_depth_summary,
-                "sources": [hashed_articles[h]["source"] for h in topic_info["hashes"] if h in hashed_articles],
-                "urls": [hashed_articles[h]["url"] for h in topic_info["hashes"] if h in hashed_articles],
-                "importance": avg_importance
-            })
+async def assemble_full_content(sector_topics):
+    """
+    Builds full_content.json from {sector: [summarized topics]}: sorts topics, writes each
+    sector's landing summary, links topics to the archive and saves the result.
+    """
+    final_content_output = {sector: {'landingSummary': '', 'topics': []} for sector in MARKET_SECTORS}
 
+    for sector_name, sorted_topics_list in sector_topics.items():
+        if not sorted_topics_list:
+            continue
 
         sorted_topics_list.sort(key=lambda x: x['importance'])
         final_content_output[sector_name]['topics'] = sorted_topics_list
@@ -268,8 +325,33 @@ async def summarize_sector_topic_map():
             landing_summary += formatted_description
         final_content_output[sector_name]['landingSummary'] = landing_summary
 
-    with open("full_content.json", "w", encoding='utf-8') as f:
+    await link_topics_to_archive(final_content_output)
+
+    # Write then rename, so the API never serves a half-written file while a worker is assembling it.
+    with open(FULL_CONTENT_PATH + ".tmp", "w", encoding='utf-8') as f:
         json.dump(final_content_output, f, indent=4, ensure_ascii=False)
+    os.replace(FULL_CONTENT_PATH + ".tmp", FULL_CONTENT_PATH)
+    return final_content_output
+
+
+async def summarize_sector_topic_map():
+    logging.info("Starting summarize_sector_topic_map...")
+    try:
+        with open("sector_topic_map.json", "r", encoding='utf-8') as f:
+            sector_topic_map = json.load(f)
+    except FileNotFoundError:
+        logging.error("sector_topic_map.json not found. Run previous steps first.")
+        return
+
+    sector_topics = {}
+    for sector_name, topics_in_sector in sector_topic_map.items():
+        sector_topics[sector_name] = []
+        for topic_name, topic_info in topics_in_sector.items():
+            topic = await summarize_topic(sector_name, topic_name, topic_info, article_store)
+            if topic:
+                sector_topics[sector_name].append(topic)
+
+    await assemble_full_content(sector_topics)
     logging.info("Finished summarize_sector_topic_map. full_content.json generated.")
 
 
@@ -281,10 +363,18 @@ async def run_full_processing_pipeline():
     logging.info("Full news processing pipeline completed successfully.")
 
 
+def queue_processing_run():
+    """
+    Queues a full pipeline run for the worker processes (see worker.py). Returns the run ID.
+    A worker fetches today's articles; others then classify them, summarize each topic and assemble full_content.json.
+    """
+    return JobQueue().create_run("fetch", [{}])
+
+
 @app.route('/api/summarize_news', methods=['GET'])
 async def serve_summarized_news():
     try:
-        with open("full_content.json", "r", encoding='utf-8') as f:
+        with open(FULL_CONTENT_PATH, "r", encoding='utf-8') as f:
             data = json.load(f)
         return jsonify(data)
     except FileNotFoundError:
@@ -294,15 +384,40 @@ async def serve_summarized_news():
         logging.error(f"Error serving summarized news: {e}")
         return jsonify({"error": f"Failed to retrieve data: {str(e)}"}), 500
 
+@app.route('/api/topics/<topic_id>/timeline', methods=['GET'])
+async def serve_topic_timeline(topic_id):
+    try:
+        timeline = topic_archive.timeline(topic_id)
+        if not timeline:
+            return jsonify({"error": f"Topic '{topic_id}' not found in archive."}), 404
+        return jsonify({"threadId": timeline[0]["thread_id"], "timeline": timeline})
+    except Exception as e:
+        logging.error(f"Error serving timeline for topic '{topic_id}': {e}")
+        return jsonify({"error": f"Failed to retrieve timeline: {str(e)}"}), 500
+
 @app.route('/api/trigger_processing', methods=['POST'])
 async def trigger_processing_endpoint():
     try:
+        if PIPELINE_MODE == "distributed":
+            run_id = queue_processing_run()
+            return jsonify({"message": "News processing run queued for workers. Data will be updated shortly.", "runId": run_id}), 202
         asyncio.create_task(run_full_processing_pipeline())
         return jsonify({"message": "News processing pipeline triggered. Data will be updated shortly."}), 202
     except Exception as e:
         logging.error(f"Error triggering processing pipeline: {e}")
         return jsonify({"error": f"Failed to trigger processing: {str(e)}"}), 500
 
+@app.route('/api/runs/<run_id>', methods=['GET'])
+async def serve_run_status(run_id):
+    try:
+        status = JobQueue().run_status(run_id)
+        if status is None:
+            return jsonify({"error": f"Run '{run_id}' not found."}), 404
+        return jsonify(status)
+    except Exception as e:
+        logging.error(f"Error serving status for run '{run_id}': {e}")
+        return jsonify({"error": f"Failed to retrieve run status: {str(e)}"}), 500
+
 
 @app.route('/')
 def health_check():
@@ -315,6 +430,9 @@ if __name__ == '__main__':
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
     
-    loop.run_until_complete(run_full_processing_pipeline()) 
+    if PIPELINE_MODE == "distributed":
+        queue_processing_run()
+    else:
+        loop.run_until_complete(run_full_processing_pipeline()) 
     
     app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file
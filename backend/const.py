@@ -57,4 +57,28 @@ MARKET_SEARCH_QUERY = (
 )
 
 PUBLISHED_FROM_TIMESTAMP = int((datetime.now() - timedelta(days=1)).replace(hour=7, minute=0, second=0, microsecond=0).timestamp())
-PUBLISHED_FROM_DATE = (datetime.now() - timedelta(days=1)).replace(hour=7, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
\ No newline at end of file
+PUBLISHED_FROM_DATE = (datetime.now() - timedelta(days=1)).replace(hour=7, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
+
+# --- Historical Topic Archive ---
+TOPIC_ARCHIVE_DIR = "topic_archive"
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+TOPIC_LINK_TOP_K = 5 # Number of prior topics considered when linking a new topic
+TOPIC_LINK_THRESHOLD = 0.82 # Minimum cosine similarity to treat a new topic as a continuation
+
+# --- HTML Parsing Pool ---
+PARSE_WORKERS = None # Number of parsing processes; None uses every available core
+PARSE_QUEUE_SIZE = 64 # Maximum raw pages buffered between fetchers and parsers
+
+# --- Distributed Worker Mode ---
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "local") # "local" runs the pipeline in the API process; "distributed" hands it to worker.py processes
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3") # Must be on storage shared by the API and every worker
+FULL_CONTENT_PATH = os.getenv("FULL_CONTENT_PATH", "full_content.json") # Written by the pipeline (or a worker's reduce job), served by the API
+JOB_LEASE_SECONDS = 300 # A leased job is handed to another worker if not completed within this time
+JOB_MAX_ATTEMPTS = 3
+WORKER_POLL_SECONDS = 2
+
+# --- Article Store ---
+ARTICLE_STORE_DIR = "article_store"
+ARTICLE_COMPRESSION_LEVEL = 6 # Valid for both zlib (1-9) and zstd (1-22)
+ARTICLE_RETENTION_DAYS = 30 # Older articles are dropped from the article store when it is compacted after each fetch
@@ -0,0 +1,268 @@
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from const import *
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs(status, job_id);
+CREATE INDEX IF NOT EXISTS jobs_by_run ON jobs(run_id, kind, status);
+"""
+
+
+class JobQueue:
+    """
+    Durable job queue backed by a single SQLite file, shared by the API process and any number of workers.
+
+    Jobs move pending -> leased -> done. A leased job whose lease expires (its worker crashed or hung)
+    becomes leasable again until it has been attempted JOB_MAX_ATTEMPTS times, after which it is marked failed.
+    Workers hold keep_alive while running a job, so only a worker that stops renewing loses its lease.
+    Each run also has a stage; advance_stage moves a run to its next stage and enqueues that stage's jobs
+    atomically, so exactly one worker performs each transition.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # A fresh connection per transaction keeps the queue safe to use from threads and forked processes.
+        # The default rollback journal is kept (not WAL) so the file can live on storage shared between hosts.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _insert_jobs(self, conn, run_id, kind, payloads):
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO jobs (run_id, kind, payload, updated_at) VALUES (?, ?, ?, ?)",
+            [(run_id, kind, json.dumps(payload, ensure_ascii=False), now) for payload in payloads]
+        )
+
+    def create_run(self, stage, payloads):
+        """
+        Starts a new run in `stage` and enqueues one job of that kind per payload. Returns the run ID.
+        """
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO runs (run_id, stage, created_at, updated_at) VALUES (?, ?, ?, ?)", (run_id, stage, now, now))
+            self._insert_jobs(conn, run_id, stage, payloads)
+        logging.info(f"Created run {run_id} with {len(payloads)} '{stage}' jobs.")
+        return run_id
+
+    def lease(self, worker_id, kinds=None):
+        """
+        Leases the oldest available job, optionally restricted to `kinds`. Returns a dict with
+        'job_id', 'run_id', 'kind', 'payload' and 'attempts', or None if nothing is available.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs whose last allowed attempt timed out will never be retried.
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired on final attempt', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+
+            query = "SELECT * FROM jobs WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+            params = [now]
+            if kinds:
+                query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            row = conn.execute(query + " ORDER BY job_id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+
+            if row["status"] == 'leased':
+                logging.warning(f"Reclaiming job {row['job_id']} from {row['lease_owner']} after its lease expired.")
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                (worker_id, now + self.lease_seconds, now, row["job_id"])
+            )
+
+        return {
+            "job_id": row["job_id"],
+            "run_id": row["run_id"],
+            "kind": row["kind"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1
+        }
+
+    def complete(self, job_id, worker_id, result):
+        """
+        Records a job's result. Returns False if the lease was lost to another worker, in which case the result is discarded.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id, worker_id):
+        """
+        Extends a job's lease by another lease period. Returns False if the lease was already lost to another worker.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE job_id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def keep_alive(self, job_id, worker_id):
+        """
+        Renews the job's lease every third of a lease period while the block runs, so a slow but healthy job
+        (e.g. a long fetch) is not reclaimed by another worker. Renewal runs on a thread because job handlers
+        make blocking calls that would starve an event-loop task.
+        """
+        stopped = threading.Event()
+
+        def renew_until_stopped():
+            while not stopped.wait(self.lease_seconds / 3):
+                try:
+                    if not self.renew(job_id, worker_id):
+                        logging.warning(f"Lost lease on job {job_id}; another worker may be running it.")
+                        return
+                except sqlite3.Error as e:
+                    logging.error(f"Error renewing lease on job {job_id}: {e}")
+
+        renewer = threading.Thread(target=renew_until_stopped, daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            renewer.join()
+
+    def fail(self, job_id, worker_id, error):
+        """
+        Releases a job after an error. It is retried until it reaches JOB_MAX_ATTEMPTS, then marked failed.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, str(error), time.time(), job_id, worker_id)
+            )
+
+    def active_runs(self):
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT run_id, stage FROM runs WHERE stage NOT IN ('done', 'failed') ORDER BY created_at").fetchall()
+        return [(row["run_id"], row["stage"]) for row in rows]
+
+    def stage_finished(self, run_id, stage):
+        """
+        True once every job of `stage` in the run is done or failed.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND kind = ? AND status IN ('pending', 'leased')",
+                (run_id, stage)
+            ).fetchone()
+        return row[0] == 0
+
+    def job_counts(self, run_id, kind):
+        """
+        Returns {status: count} for the run's jobs of `kind`.
+        """
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS count FROM jobs WHERE run_id = ? AND kind = ? GROUP BY status",
+                (run_id, kind)
+            ).fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def results(self, run_id, kind):
+        """
+        Returns (payload, result) pairs for every completed job of `kind` in the run, in enqueue order.
+        """
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT payload, result FROM jobs WHERE run_id = ? AND kind = ? AND status = 'done' ORDER BY job_id",
+                (run_id, kind)
+            ).fetchall()
+        return [(json.loads(row["payload"]), json.loads(row["result"])) for row in rows]
+
+    def advance_stage(self, run_id, from_stage, to_stage, payloads=()):
+        """
+        Moves a run from `from_stage` to `to_stage` and enqueues `payloads` as `to_stage` jobs, all in one transaction.
+        Returns False without changing anything if another worker already advanced the run or `from_stage` has unfinished jobs.
+        """
+        with self._transaction() as conn:
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND kind = ? AND status IN ('pending', 'leased')",
+                (run_id, from_stage)
+            ).fetchone()[0]
+            if remaining:
+                return False
+            cursor = conn.execute(
+                "UPDATE runs SET stage = ?, updated_at = ? WHERE run_id = ? AND stage = ?",
+                (to_stage, time.time(), run_id, from_stage)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._insert_jobs(conn, run_id, to_stage, payloads)
+        logging.info(f"Run {run_id} advanced from '{from_stage}' to '{to_stage}' with {len(payloads)} jobs.")
+        return True
+
+    def run_status(self, run_id):
+        """
+        Returns the run's stage and per-kind job counts by status, or None if the run does not exist.
+        """
+        with self._transaction() as conn:
+            run = conn.execute("SELECT stage, created_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            rows = conn.execute(
+                "SELECT kind, status, COUNT(*) AS count FROM jobs WHERE run_id = ? GROUP BY kind, status",
+                (run_id,)
+            ).fetchall()
+
+        jobs = {}
+        for row in rows:
+            jobs.setdefault(row["kind"], {})[row["status"]] = row["count"]
+        return {"run_id": run_id, "stage": run["stage"], "created_at": run["created_at"], "jobs": jobs}
@@ -0,0 +1,70 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from const import *
+
+_DONE = object()
+
+
+async def _produce(source_index, fetch_pages, parse_page, queue, loop):
+    """
+    Runs a blocking fetcher in a thread and feeds its raw pages into the queue, tagged with their position.
+    Blocks the fetcher whenever the queue is full, so memory stays bounded if parsing falls behind.
+    """
+    def pump():
+        for sequence, page in enumerate(fetch_pages()):
+            asyncio.run_coroutine_threadsafe(queue.put(((source_index, sequence), parse_page, page)), loop).result()
+
+    try:
+        await asyncio.to_thread(pump)
+    except Exception as e:
+        logging.error(f"Error in fetcher {fetch_pages.__name__}: {e}")
+
+
+async def _consume(queue, pool, loop, articles):
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            return
+        position, parse_page, page = item
+        try:
+            articles.append((position, await loop.run_in_executor(pool, parse_page, page)))
+        except Exception as e:
+            logging.error(f"Error parsing {page.get('url')} with {parse_page.__name__}: {e}")
+
+
+async def fetch_and_parse(sources, max_workers=PARSE_WORKERS, queue_size=PARSE_QUEUE_SIZE):
+    """
+    Fetches raw pages from every source concurrently and parses them in a process pool.
+
+    `sources` is a list of (fetch_pages, parse_page) pairs. `fetch_pages` is a blocking callable returning
+    an iterable of raw pages; `parse_page` must be a module-level function so it can be sent to worker processes.
+    Network I/O stays on threads while HTML parsing runs across cores, outside the GIL.
+
+    Returns:
+        list: Parsed articles ordered by source, then by the order each fetcher returned them.
+              Downstream topic grouping depends on this order, so it must not vary with parsing speed.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    articles = []
+
+    num_consumers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=num_consumers) as pool:
+        # One consumer per worker process keeps every core busy without queueing extra pages in the pool itself.
+        consumers = [asyncio.create_task(_consume(queue, pool, loop, articles)) for _ in range(num_consumers)]
+
+        await asyncio.gather(*(
+            _produce(source_index, fetch_pages, parse_page, queue, loop)
+            for source_index, (fetch_pages, parse_page) in enumerate(sources)
+        ))
+
+        for _ in range(num_consumers):
+            await queue.put(_DONE)
+        await asyncio.gather(*consumers)
+
+    articles.sort(key=lambda item: item[0])
+    logging.info(f"Parsed {len(articles)} articles from {len(sources)} sources using {num_consumers} processes.")
+    return [article for _, article in articles]
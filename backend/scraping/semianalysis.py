@@ -10,34 +10,33 @@ from const import * # Make sure const.py is in the same directory and defines PU
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def scrape_semianalysis_articles():
+BASE_URL = "https://semianalysis.com"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9', # Good practice to include
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
+    'Connection': 'keep-alive'
+}
+
+def fetch_semianalysis_pages():
     """
-    Scrapes recent articles from semianalysis.com's archives section.
-    It stops when it encounters an article older than PUBLISHED_FROM_TIMESTAMP.
+    Fetches recent article pages from semianalysis.com's archives section without parsing their bodies.
+    It stops when it encounters an article older than the cutoff.
 
-    Returns:
-        list: A list of dictionaries, where each dictionary represents an article.
-              Each article dict contains: 'title', 'description', 'content', 'url', 'publishedAt', 'source'.
+    Yields:
+        dict: A raw page with 'html' (the article page as decoded text), 'url', 'publishedAt' and 'source'.
+              Pass it to parse_semianalysis_article to extract the article.
     """
-    base_url = "https://semianalysis.com"
-    archives_url = f"{base_url}/archives/" # Corrected URL to archives channel
-
-    articles_data = []
+    archives_url = f"{BASE_URL}/archives/" # Corrected URL to archives channel
 
     # For testing: use 10-day lookback instead of PUBLISHED_FROM_TIMESTAMP from const.py
     test_timestamp = int((datetime.now() - timedelta(days=10)).timestamp())
-    cutoff_timestamp_ms = test_timestamp * 1000
     
     logging.info(f"Starting scrape of {archives_url}. Collecting articles newer than timestamp: {test_timestamp}s (which is {datetime.fromtimestamp(test_timestamp).strftime('%Y-%m-%d %H:%M:%S')})")
 
+    pages_fetched = 0
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9', # Good practice to include
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
-            'Connection': 'keep-alive'
-        }
-        response = requests.get(archives_url, headers=headers, timeout=20) # Increased timeout further
+        response = requests.get(archives_url, headers=HEADERS, timeout=20) # Increased timeout further
         response.raise_for_status()
 
         logging.info(response.text)
@@ -48,13 +47,13 @@ def scrape_semianalysis_articles():
         ul_element = soup.select_one('ul.archive-cards')
         if not ul_element:
             logging.error("Could not find ul element within archive-cards. Page structure may have changed.")
-            return []
+            return
 
         # Get all li elements
         li_elements = ul_element.find_all('li')
         if not li_elements:
             logging.error("No li elements found in the ul. Page structure may have changed.")
-            return []
+            return
 
         logging.info(f"Found {len(li_elements)} list items to process.")
 
@@ -99,63 +98,26 @@ def scrape_semianalysis_articles():
             article_url = link_element['href']
             # If the URL is relative, make it absolute
             if not article_url.startswith('http'):
-                article_url = base_url + article_url if article_url.startswith('/') else base_url + '/' + article_url
+                article_url = BASE_URL + article_url if article_url.startswith('/') else BASE_URL + '/' + article_url
             
-            # Try to extract title from the link or from other elements in the li
-            article_title = link_element.get('title', '') or link_element.get_text(strip=True)
-            if not article_title:
-                # Fallback: look for title in other elements
-                title_element = li.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                article_title = title_element.get_text(strip=True) if title_element else "No Title Found"
+            logging.info(f"Fetching recent article: {article_url} (Published: {published_datetime.strftime('%Y-%m-%d %H:%M:%S')})")
             
-            logging.info(f"Processing recent article: {article_url} (Published: {published_datetime.strftime('%Y-%m-%d %H:%M:%S')})")
-            
-            # Fetch the individual article page
+            # Fetch the individual article page; parsing happens separately so it can run in another process
             try:
-                article_response = requests.get(article_url, headers=headers, timeout=20) # Increased timeout
+                article_response = requests.get(article_url, headers=HEADERS, timeout=20) # Increased timeout
                 article_response.raise_for_status()
-                
-                article_soup = BeautifulSoup(article_response.text, 'html.parser')
-
-                title_meta = article_soup.find('meta', property='og:title')
-                article_title = title_meta['content'].strip() if title_meta and 'content' in title_meta.attrs else "No Title Found"
-
-                # Extract description/excerpt - often from meta property="og:description"
-                description_meta = article_soup.select_one('h2.wp-block-semianalysis-sub-title')
-                article_description = description_meta.get_text(strip=True).replace('/', '').strip() if description_meta else "No Description Found"
-
-                # Extract full article content - Semianalysis uses <section class="gh-content gh-canvas">
-                content_section = article_soup.find('main')
-
-                full_content_text = ""
-                if content_section:
-                    paragraphs = content_section.find_all('p')
-                    full_content_text = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-                    
-                    if not full_content_text.strip(): # Fallback for other content types
-                        full_content_text = content_section.get_text(separator='\n', strip=True)
-                
-                # Final fallback if content extraction failed, use description
-                if not full_content_text.strip() and article_description.strip():
-                    logging.warning(f"No substantial content found for {article_url}. Using description as fallback for content.")
-                    full_content_text = article_description 
-                elif not full_content_text.strip():
-                    logging.warning(f"No content or description found for {article_url}. Content will be empty.")
-                
-                articles_data.append({
-                    "title": article_title,
-                    "description": article_description,
-                    "content": full_content_text,
-                    "source": "Semianalysis",
-                    "url": article_url,
-                    "publishedAt": published_datetime.isoformat()
-                })
-                time.sleep(0.5) # Be polite: pause for 0.5 seconds between article fetches
-            
             except requests.exceptions.RequestException as e:
                 logging.error(f"Error fetching individual article {article_url}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing article {article_url}: {e}")
+                continue
+
+            pages_fetched += 1
+            yield {
+                "html": article_response.text, # Already decoded by requests, so BeautifulSoup does not have to guess the encoding
+                "source": "Semianalysis",
+                "url": article_url,
+                "publishedAt": published_datetime.isoformat()
+            }
+            time.sleep(0.5) # Be polite: pause for 0.5 seconds between article fetches
             
         else: # This 'else' belongs to the for loop and executes if loop completes normally (no break)
             logging.info("End of archive page reached without encountering old articles.")
@@ -166,6 +128,69 @@ def scrape_semianalysis_articles():
     except Exception as e:
         logging.error(f"An unexpected error occurred during scraping: {e}")
 
+    logging.info(f"Finished fetching. Found {pages_fetched} recent article pages from Semianalysis.")
+
+def parse_semianalysis_article(page):
+    """
+    Extracts the title, description and content from a raw page yielded by fetch_semianalysis_pages.
+    CPU-bound and free of shared state, so it is safe to run in a process pool.
+
+    Returns:
+        dict: The article with 'title', 'description', 'content', 'url', 'publishedAt', 'source'.
+    """
+    article_url = page["url"]
+    article_soup = BeautifulSoup(page["html"], 'html.parser')
+
+    title_meta = article_soup.find('meta', property='og:title')
+    article_title = title_meta['content'].strip() if title_meta and 'content' in title_meta.attrs else "No Title Found"
+
+    # Extract description/excerpt - often from meta property="og:description"
+    description_meta = article_soup.select_one('h2.wp-block-semianalysis-sub-title')
+    article_description = description_meta.get_text(strip=True).replace('/', '').strip() if description_meta else "No Description Found"
+
+    # Extract full article content - Semianalysis uses <section class="gh-content gh-canvas">
+    content_section = article_soup.find('main')
+
+    full_content_text = ""
+    if content_section:
+        paragraphs = content_section.find_all('p')
+        full_content_text = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+        
+        if not full_content_text.strip(): # Fallback for other content types
+            full_content_text = content_section.get_text(separator='\n', strip=True)
+    
+    # Final fallback if content extraction failed, use description
+    if not full_content_text.strip() and article_description.strip():
+        logging.warning(f"No substantial content found for {article_url}. Using description as fallback for content.")
+        full_content_text = article_description 
+    elif not full_content_text.strip():
+        logging.warning(f"No content or description found for {article_url}. Content will be empty.")
+    
+    return {
+        "title": article_title,
+        "description": article_description,
+        "content": full_content_text,
+        "source": page["source"],
+        "url": article_url,
+        "publishedAt": page["publishedAt"]
+    }
+
+def scrape_semianalysis_articles():
+    """
+    Scrapes recent articles from semianalysis.com's archives section, fetching and parsing sequentially.
+    The pipeline uses fetch_semianalysis_pages and parse_semianalysis_article directly to parse in parallel.
+
+    Returns:
+        list: A list of dictionaries, where each dictionary represents an article.
+              Each article dict contains: 'title', 'description', 'content', 'url', 'publishedAt', 'source'.
+    """
+    articles_data = []
+    for page in fetch_semianalysis_pages():
+        try:
+            articles_data.append(parse_semianalysis_article(page))
+        except Exception as e:
+            logging.error(f"Error processing article {page['url']}: {e}")
+
     logging.info(f"Finished scraping. Found {len(articles_data)} recent articles from Semianalysis.")
     return articles_data
 
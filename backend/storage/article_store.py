@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import zlib
+import fcntl
+import logging
+from contextlib import contextmanager
+from const import *
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+METADATA_FIELDS = ("title", "description", "source", "url", "publishedAt")
+
+
+def _compress(text):
+    data = text.encode('utf-8')
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ARTICLE_COMPRESSION_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ARTICLE_COMPRESSION_LEVEL)
+
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Article was compressed with zstd but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+class ArticleStore:
+    """
+    Article corpus keyed by article hash, bounded by a retention window.
+
+    Article bodies are compressed individually and appended to a segment file. `index.jsonl` starts with a
+    header line naming the current segment, followed by one line per article with its metadata, when it was
+    stored, and the offset and length of its body in the segment. Metadata is loaded eagerly; bodies are read
+    and decompressed only when get_content is called.
+
+    Articles stored more than ARTICLE_RETENTION_DAYS ago are ignored on load. compact() copies the live
+    articles into a new segment and index and removes the old segment, so disk use stays bounded too.
+
+    Uses zstd when the zstandard package is installed and zlib otherwise. The codec is recorded per article,
+    so a store written with one can still be read after switching.
+    """
+
+    def __init__(self, directory=ARTICLE_STORE_DIR, retention_days=ARTICLE_RETENTION_DAYS):
+        self.directory = directory
+        self.retention_seconds = retention_days * 24 * 60 * 60
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.lock_path = os.path.join(directory, "store.lock")
+        os.makedirs(directory, exist_ok=True)
+
+        with self._locked(fcntl.LOCK_EX):
+            if not os.path.exists(self.index_path):
+                self._write_index(self.index_path, "articles.seg", [])
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self._index = {}
+        self._index_position = 0
+        self._index_inode = None
+        self._expired = 0
+        self.segment_path = os.path.join(self.directory, "articles.seg")
+
+    @contextmanager
+    def _locked(self, operation):
+        # The API process and workers share the store: readers take a shared lock, writers and compaction an exclusive one.
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_index(self, path, segment_name, entries):
+        with open(path, "w", encoding='utf-8') as f:
+            f.write(json.dumps({"segment": segment_name}) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def refresh(self):
+        """
+        Loads index entries appended since the last refresh, e.g. by the API process while a worker is running.
+        """
+        with self._locked(fcntl.LOCK_SH):
+            self._refresh()
+
+    def _refresh(self):
+        # compact() replaces the index file; start over when that happens, since every offset has changed.
+        if os.stat(self.index_path).st_ino != self._index_inode:
+            self._reset()
+            self._index_inode = os.stat(self.index_path).st_ino
+
+        cutoff = time.time() - self.retention_seconds
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_position)
+            for line in f:
+                # A line without its newline is still being written; pick it up on the next refresh.
+                if not line.endswith(b"\n"):
+                    break
+                self._index_position += len(line)
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "hash" not in entry:
+                    self.segment_path = os.path.join(self.directory, entry["segment"])
+                elif entry.get("storedAt", 0) < cutoff:
+                    self._expired += 1
+                else:
+                    self._index[entry["hash"]] = entry
+
+    def __contains__(self, article_hash):
+        return article_hash in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def add_articles(self, hashed_articles):
+        """
+        Stores every article in {hash: article} that is not already present. Returns the number of articles added.
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._refresh()
+            new_articles = [(h, a) for h, a in hashed_articles.items() if h not in self._index]
+            if not new_articles:
+                return 0
+
+            entries = []
+            stored_at = time.time()
+            # Bodies first: an index line is only written once its body is on disk, so a crash never leaves a dangling entry.
+            with open(self.segment_path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                for article_hash, article in new_articles:
+                    codec, data = _compress(article.get("content") or "")
+                    entry = {field: article.get(field) for field in METADATA_FIELDS}
+                    entry.update({"hash": article_hash, "storedAt": stored_at, "offset": f.tell(), "length": len(data), "codec": codec})
+                    f.write(data)
+                    entries.append(entry)
+
+            with open(self.index_path, "a", encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._refresh()
+
+        logging.info(f"Stored {len(entries)} new articles in {self.directory} ({len(self._index)} total).")
+        return len(entries)
+
+    def compact(self):
+        """
+        Rewrites the segment and index without articles older than the retention window. Does nothing if none have expired.
+        Returns the number of articles dropped.
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._refresh()
+            cutoff = time.time() - self.retention_seconds
+            live_entries = [entry for entry in self._index.values() if entry["storedAt"] >= cutoff]
+            dropped = self._expired + len(self._index) - len(live_entries)
+            if not dropped:
+                return 0
+
+            old_segment_path = self.segment_path
+            segment_name = f"articles-{int(time.time() * 1000)}.seg"
+            compacted_entries = []
+            with open(old_segment_path, "rb") as source, open(os.path.join(self.directory, segment_name), "wb") as target:
+                for entry in live_entries:
+                    source.seek(entry["offset"])
+                    data = source.read(entry["length"])
+                    compacted_entries.append({**entry, "offset": target.tell()})
+                    target.write(data)
+
+            # Swapping in the new index is atomic; until it happens, readers keep using the old index and segment.
+            index_tmp_path = self.index_path + ".tmp"
+            self._write_index(index_tmp_path, segment_name, compacted_entries)
+            os.replace(index_tmp_path, self.index_path)
+            os.remove(old_segment_path)
+            self._refresh()
+
+        logging.info(f"Compacted {self.directory}: dropped {dropped} expired articles, kept {len(compacted_entries)}.")
+        return dropped
+
+    def get_metadata(self, article_hash):
+        """
+        Returns the article's title, description, source, url and publishedAt, or None if it is not stored.
+        """
+        entry = self._index.get(article_hash)
+        if entry is None:
+            return None
+        return {field: entry.get(field) for field in METADATA_FIELDS}
+
+    def get_content(self, article_hash):
+        """
+        Reads and decompresses the article's body. Returns None if it is not stored.
+        """
+        with self._locked(fcntl.LOCK_SH):
+            # Picks up a compaction by another process, which would otherwise leave our offsets pointing into a deleted segment.
+            self._refresh()
+            entry = self._index.get(article_hash)
+            if entry is None:
+                return None
+            with open(self.segment_path, "rb") as f:
+                f.seek(entry["offset"])
+                data = f.read(entry["length"])
+        return _decompress(entry["codec"], data)
@@ -0,0 +1,233 @@
+import os
+import json
+import fcntl
+import uuid
+import logging
+import numpy as np
+from contextlib import contextmanager
+from const import *
+
+# Rows scored per step when scanning the archive. Keeps peak memory bounded no matter how much history exists.
+SEARCH_CHUNK_ROWS = 8192
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class TopicArchive:
+    """
+    Append-only archive of every topic produced by past pipeline runs.
+
+    Embeddings are stored as raw, L2-normalized float32 rows in `embeddings.f32` and read back
+    through a NumPy memmap, so similarity lookups scan the history in chunks instead of loading it
+    into RAM. Per-row metadata lives in `topics.jsonl`, one line per row, in the same order.
+
+    Topics that continue an earlier story share a `thread_id`, which is the `topic_id` of the first
+    topic seen in that thread.
+    """
+
+    def __init__(self, directory=TOPIC_ARCHIVE_DIR, dim=EMBEDDING_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.embeddings_path = os.path.join(directory, "embeddings.f32")
+        self.metadata_path = os.path.join(directory, "topics.jsonl")
+        self.lock_path = os.path.join(directory, "archive.lock")
+        self._row_bytes = self.dim * np.dtype(np.float32).itemsize
+        os.makedirs(directory, exist_ok=True)
+
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self._metadata = []
+        self._metadata_position = 0
+        self._rows = 0
+        self._by_topic_id = {}
+        self._by_thread_id = {}
+        self._by_key = {}
+
+    @contextmanager
+    def _locked(self):
+        # Several processes (the API and any number of workers) share the archive; every read and write holds this lock.
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self):
+        """
+        Loads topics appended since the last refresh, e.g. by a worker process.
+        """
+        with self._locked():
+            self._refresh()
+
+    def _refresh(self):
+        new_entries = []
+        if os.path.exists(self.metadata_path):
+            with open(self.metadata_path, "rb") as f:
+                f.seek(self._metadata_position)
+                for line in f:
+                    # Writers hold the lock, so a line without its newline can only be left by a crash.
+                    if not line.endswith(b"\n"):
+                        break
+                    self._metadata_position += len(line)
+                    if line.strip():
+                        new_entries.append(json.loads(line))
+
+        total_rows = len(self._metadata) + len(new_entries)
+        embeddings_size = os.path.getsize(self.embeddings_path) if os.path.exists(self.embeddings_path) else 0
+        metadata_size = os.path.getsize(self.metadata_path) if os.path.exists(self.metadata_path) else 0
+
+        # An interrupted append can leave one file ahead of the other, or a partial row or line at the end;
+        # only whole rows present in both are usable.
+        if embeddings_size != total_rows * self._row_bytes or metadata_size != self._metadata_position:
+            usable_rows = min(embeddings_size // self._row_bytes, total_rows)
+            logging.warning(f"Topic archive files out of sync ({embeddings_size} embedding bytes, {total_rows} metadata rows). Truncating to {usable_rows} rows.")
+            new_entries = (self._metadata + new_entries)[:usable_rows]
+            with open(self.embeddings_path, "ab") as f:
+                f.truncate(usable_rows * self._row_bytes)
+            with open(self.metadata_path, "w", encoding='utf-8') as f:
+                for entry in new_entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._reset()
+            self._metadata_position = os.path.getsize(self.metadata_path)
+
+        for entry in new_entries:
+            self._metadata.append(entry)
+            self._index_entry(entry)
+        self._rows = len(self._metadata)
+
+    def _index_entry(self, entry):
+        self._by_topic_id[entry["topic_id"]] = entry
+        self._by_thread_id.setdefault(entry["thread_id"], []).append(entry)
+        self._by_key[(entry["date"], entry["sector"], entry["name"])] = entry
+
+    def __len__(self):
+        return self._rows
+
+    def search(self, vectors, k=TOPIC_LINK_TOP_K, exclude_date=None):
+        """
+        Returns, for each query vector, the top-k archived topics by cosine similarity
+        as a list of (score, metadata) tuples sorted best first. Topics archived on `exclude_date` are skipped.
+        """
+        with self._locked():
+            self._refresh()
+            return self._search(vectors, k, exclude_date)
+
+    def _search(self, vectors, k, exclude_date):
+        queries = _normalize(vectors)
+        if self._rows == 0:
+            return [[] for _ in range(len(queries))]
+
+        matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode='r', shape=(self._rows, self.dim))
+        k = min(k, self._rows)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, self._rows, SEARCH_CHUNK_ROWS):
+            chunk = np.asarray(matrix[start:start + SEARCH_CHUNK_ROWS])
+            scores = queries @ chunk.T
+            if exclude_date is not None:
+                excluded = np.array([entry["date"] == exclude_date for entry in self._metadata[start:start + len(chunk)]])
+                scores[:, excluded] = -np.inf
+            rows = np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)
+
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        del matrix
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([(float(scores[i]), self._metadata[rows[i]]) for i in order if np.isfinite(scores[i])])
+        return results
+
+    def link_and_append(self, topics, vectors, date, k=TOPIC_LINK_TOP_K, threshold=TOPIC_LINK_THRESHOLD):
+        """
+        Links each new topic to the closest topic from an earlier date (if similar enough) and appends the batch to the archive.
+
+        `topics` is a list of dicts with 'sector', 'name', 'description', 'importance' and 'urls'.
+        Returns the archived metadata entries in the same order, each carrying its 'topic_id' and 'thread_id'.
+        A topic already archived under the same date, sector and name (e.g. from a rerun that day) is not
+        appended again; its existing entry is returned instead.
+        """
+        if not topics:
+            return []
+
+        vectors = _normalize(vectors)
+        with self._locked():
+            # Another process may have archived topics since our last read; appending without them would misalign rows.
+            self._refresh()
+            return self._link_and_append(topics, vectors, date, k, threshold)
+
+    def _link_and_append(self, topics, vectors, date, k, threshold):
+        existing = [self._by_key.get((date, topic.get("sector"), topic.get("name"))) for topic in topics]
+        new_positions = [i for i, entry in enumerate(existing) if entry is None]
+        vectors = vectors[new_positions]
+
+        # Search before appending and skip today's rows, so topics are never linked to others from the same day.
+        matches = self._search(vectors, k, date) if new_positions else []
+
+        entries = []
+        for topic, candidates in zip([topics[i] for i in new_positions], matches):
+            topic_id = uuid.uuid4().hex
+            thread_id = topic_id
+            linked_to = None
+            if candidates and candidates[0][0] >= threshold:
+                score, prior = candidates[0]
+                thread_id = prior["thread_id"]
+                linked_to = {"topic_id": prior["topic_id"], "score": round(score, 4)}
+
+            entries.append({
+                "topic_id": topic_id,
+                "thread_id": thread_id,
+                "linked_to": linked_to,
+                "date": date,
+                "sector": topic.get("sector"),
+                "name": topic.get("name"),
+                "description": topic.get("description"),
+                "importance": float(topic.get("importance", 0)),
+                "urls": topic.get("urls", [])
+            })
+
+        if entries:
+            # Embeddings first: on load, rows without metadata are dropped, so a crash between the two writes is harmless.
+            with open(self.embeddings_path, "ab") as f:
+                f.write(vectors.astype(np.float32).tobytes())
+            with open(self.metadata_path, "a", encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            self._refresh()
+
+        for position, entry in zip(new_positions, entries):
+            existing[position] = entry
+
+        linked = sum(1 for entry in entries if entry["linked_to"])
+        logging.info(f"Archived {len(entries)} topics for {date} ({len(topics) - len(entries)} already archived); {linked} linked to earlier coverage.")
+        return existing
+
+    def get(self, topic_id):
+        self.refresh()
+        return self._by_topic_id.get(topic_id)
+
+    def timeline(self, topic_id):
+        """
+        Returns every archived topic in the same thread as `topic_id`, oldest first.
+        """
+        self.refresh()
+        entry = self._by_topic_id.get(topic_id)
+        if entry is None:
+            return []
+        return sorted(self._by_thread_id.get(entry["thread_id"], []), key=lambda e: e["date"])
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Backend modules import each other as top-level modules (e.g. `from const import *`), as when run from backend/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# const.py exits at import time without these; the tests never call the external APIs.
+for key in ("OPENAI_API_KEY", "NEWSAPI_KEY", "GUARDIAN_API_KEY", "WEBZ_API_KEY"):
+    os.environ.setdefault(key, "test")
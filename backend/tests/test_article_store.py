@@ -0,0 +1,39 @@
+import os
+import time
+from storage.article_store import ArticleStore
+
+
+def article(title, content):
+    return {"title": title, "description": f"{title} description", "content": content, "source": "Test", "url": f"https://example.com/{title}", "publishedAt": "2025-07-01T00:00:00+00:00"}
+
+
+def test_content_is_loaded_lazily_and_shared_between_instances(tmp_path):
+    writer = ArticleStore(directory=str(tmp_path))
+    reader = ArticleStore(directory=str(tmp_path))
+
+    assert writer.add_articles({"a": article("a", "body " * 100), "b": article("b", "")}) == 2
+    assert writer.add_articles({"a": article("a", "changed")}) == 0
+
+    assert "a" not in reader
+    assert reader.get_content("a") == "body " * 100
+    assert reader.get_content("b") == ""
+    assert reader.get_metadata("b")["url"] == "https://example.com/b"
+
+
+def test_compact_drops_expired_articles(tmp_path, monkeypatch):
+    store = ArticleStore(directory=str(tmp_path), retention_days=1)
+    store.add_articles({"old": article("old", "old body")})
+
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 2 * 24 * 60 * 60)
+    store.add_articles({"new": article("new", "new body")})
+    reader = ArticleStore(directory=str(tmp_path), retention_days=1)
+
+    assert "old" not in reader
+    assert store.compact() == 1
+    assert store.compact() == 0
+
+    segments = [name for name in os.listdir(tmp_path) if name.endswith(".seg")]
+    assert len(segments) == 1
+    assert reader.get_content("new") == "new body"
+    assert ArticleStore(directory=str(tmp_path), retention_days=1).get_content("new") == "new body"
@@ -0,0 +1,107 @@
+import time
+import threading
+import pytest
+from jobs.job_queue import JobQueue
+
+LEASE_SECONDS = 0.05
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), lease_seconds=LEASE_SECONDS, max_attempts=2)
+
+
+def test_expired_lease_is_reclaimed_and_stale_owner_cannot_complete(job_queue):
+    job_queue.create_run("classify", [{"hash": "a"}])
+
+    first = job_queue.lease("worker-a")
+    assert job_queue.lease("worker-b") is None
+
+    time.sleep(LEASE_SECONDS * 2)
+    second = job_queue.lease("worker-b")
+    assert second["job_id"] == first["job_id"]
+    assert second["attempts"] == 2
+
+    assert job_queue.complete(first["job_id"], "worker-a", {"stale": True}) is False
+    assert job_queue.complete(second["job_id"], "worker-b", {"stale": False}) is True
+    assert job_queue.results(second["run_id"], "classify") == [({"hash": "a"}, {"stale": False})]
+
+
+def test_job_fails_after_max_attempts(job_queue):
+    run_id = job_queue.create_run("classify", [{"hash": "a"}])
+
+    job = job_queue.lease("worker-a")
+    job_queue.fail(job["job_id"], "worker-a", "boom")
+    job = job_queue.lease("worker-a")
+    assert job["attempts"] == 2
+    job_queue.fail(job["job_id"], "worker-a", "boom")
+
+    assert job_queue.lease("worker-a") is None
+    assert job_queue.job_counts(run_id, "classify") == {"failed": 1}
+    assert job_queue.stage_finished(run_id, "classify")
+
+
+def test_expired_lease_on_final_attempt_is_marked_failed(job_queue):
+    run_id = job_queue.create_run("classify", [{"hash": "a"}])
+
+    job_queue.lease("worker-a")
+    time.sleep(LEASE_SECONDS * 2)
+    job_queue.lease("worker-b")
+    time.sleep(LEASE_SECONDS * 2)
+
+    assert job_queue.lease("worker-c") is None
+    assert job_queue.job_counts(run_id, "classify") == {"failed": 1}
+
+
+def test_advance_stage_waits_for_unfinished_jobs(job_queue):
+    run_id = job_queue.create_run("classify", [{"hash": "a"}])
+    assert job_queue.advance_stage(run_id, "classify", "summarize", [{}]) is False
+
+    job = job_queue.lease("worker-a")
+    job_queue.complete(job["job_id"], "worker-a", {})
+    assert job_queue.advance_stage(run_id, "classify", "summarize", [{}]) is True
+    assert job_queue.run_status(run_id)["stage"] == "summarize"
+
+
+def test_only_one_concurrent_advance_stage_succeeds(job_queue):
+    run_id = job_queue.create_run("classify", [])
+    barrier = threading.Barrier(2)
+    outcomes = []
+
+    def advance():
+        barrier.wait()
+        outcomes.append(job_queue.advance_stage(run_id, "classify", "summarize", [{"topic": "t"}]))
+
+    threads = [threading.Thread(target=advance) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == [False, True]
+    assert job_queue.job_counts(run_id, "summarize") == {"pending": 1}
+
+
+def test_renewed_lease_outlives_lease_period(job_queue):
+    run_id = job_queue.create_run("fetch", [{}])
+    job = job_queue.lease("worker-a")
+
+    with job_queue.keep_alive(job["job_id"], "worker-a"):
+        deadline = time.time() + LEASE_SECONDS * 5
+        while time.time() < deadline:
+            assert job_queue.lease("worker-b") is None
+            time.sleep(LEASE_SECONDS / 5)
+
+    assert job_queue.complete(job["job_id"], "worker-a", {"articles": []}) is True
+    assert job_queue.job_counts(run_id, "fetch") == {"done": 1}
+
+
+def test_renew_fails_after_lease_is_reclaimed(job_queue):
+    job_queue.create_run("fetch", [{}])
+    job = job_queue.lease("worker-a")
+
+    time.sleep(LEASE_SECONDS * 2)
+    job_queue.lease("worker-b")
+
+    assert job_queue.renew(job["job_id"], "worker-a") is False
+    assert job_queue.renew(job["job_id"], "worker-b") is True
@@ -0,0 +1,27 @@
+import asyncio
+import random
+import time
+from pipeline.parse_pool import fetch_and_parse
+
+
+def fetch_first_source():
+    return [{"url": f"first-{i}", "delay": random.random() / 50} for i in range(8)]
+
+
+def fetch_second_source():
+    yield from ({"url": f"second-{i}", "delay": random.random() / 50} for i in range(8))
+
+
+def parse_page(page):
+    # Random delays make pages finish out of order.
+    time.sleep(page["delay"])
+    if page["url"] == "first-3":
+        raise ValueError("unparseable")
+    return {"url": page["url"]}
+
+
+def test_articles_keep_source_and_fetch_order():
+    articles = asyncio.run(fetch_and_parse([(fetch_first_source, parse_page), (fetch_second_source, parse_page)], max_workers=4, queue_size=2))
+
+    expected = [f"first-{i}" for i in range(8) if i != 3] + [f"second-{i}" for i in range(8)]
+    assert [article["url"] for article in articles] == expected
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pytest
+import storage.topic_archive as topic_archive_module
+from storage.topic_archive import TopicArchive
+
+DIM = 4
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return TopicArchive(directory=str(tmp_path), dim=DIM)
+
+
+def topics(*names, sector="Technology & Software"):
+    return [{"sector": sector, "name": name, "description": f"{name} description", "importance": 5, "urls": []} for name in names]
+
+
+def test_chunked_search_matches_brute_force(archive, monkeypatch):
+    monkeypatch.setattr(topic_archive_module, "SEARCH_CHUNK_ROWS", 3)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, DIM))
+    archive.link_and_append(topics(*[f"topic-{i}" for i in range(20)]), vectors, "2025-07-01", threshold=2.0)
+
+    queries = rng.normal(size=(4, DIM))
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected_scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+
+    for query_results, scores in zip(archive.search(queries, k=5), expected_scores):
+        expected_names = [f"topic-{i}" for i in np.argsort(-scores)[:5]]
+        assert [entry["name"] for _, entry in query_results] == expected_names
+        assert [score for score, _ in query_results] == pytest.approx(sorted(scores, reverse=True)[:5], abs=1e-5)
+
+
+def test_reload_truncates_partial_embedding_row(archive, tmp_path):
+    archive.link_and_append(topics("a", "b"), np.eye(DIM)[:2], "2025-07-01")
+    with open(archive.embeddings_path, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    reloaded = TopicArchive(directory=str(tmp_path), dim=DIM)
+    assert len(reloaded) == 2
+    assert os.path.getsize(reloaded.embeddings_path) == 2 * DIM * 4
+
+    entries = reloaded.link_and_append(topics("c"), np.eye(DIM)[2:3], "2025-07-02")
+    assert reloaded.search(np.eye(DIM)[2:3], k=1)[0][0][1]["topic_id"] == entries[0]["topic_id"]
+
+
+def test_reload_truncates_half_written_metadata_line(archive, tmp_path):
+    archive.link_and_append(topics("a", "b"), np.eye(DIM)[:2], "2025-07-01")
+    # Crash after the embedding row was written but mid-way through its metadata line.
+    with open(archive.embeddings_path, "ab") as f:
+        f.write(np.eye(DIM, dtype=np.float32)[2].tobytes())
+    with open(archive.metadata_path, "a", encoding='utf-8') as f:
+        f.write('{"topic_id": "half')
+
+    reloaded = TopicArchive(directory=str(tmp_path), dim=DIM)
+    assert len(reloaded) == 2
+    assert os.path.getsize(reloaded.embeddings_path) == 2 * DIM * 4
+    with open(reloaded.metadata_path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_same_day_rerun_returns_existing_topic(archive):
+    first = archive.link_and_append(topics("a", "b"), np.eye(DIM)[:2], "2025-07-01")
+    rerun = archive.link_and_append(topics("a", "b"), np.eye(DIM)[:2], "2025-07-01")
+
+    assert [entry["topic_id"] for entry in rerun] == [entry["topic_id"] for entry in first]
+    assert len(archive) == 2
+
+
+def test_same_day_topics_are_not_linked(archive):
+    first = archive.link_and_append(topics("a"), np.eye(DIM)[:1], "2025-07-01")
+    same_day = archive.link_and_append(topics("a, again"), np.eye(DIM)[:1], "2025-07-01")
+
+    assert same_day[0]["linked_to"] is None
+    assert same_day[0]["thread_id"] != first[0]["thread_id"]
+
+
+def test_later_topic_joins_earlier_thread(archive, tmp_path):
+    first = archive.link_and_append(topics("Chip export controls", "Oil prices"), np.eye(DIM)[:2], "2025-07-01")
+    later = archive.link_and_append(topics("New chip export rules"), [[1.0, 0.1, 0.0, 0.0]], "2025-07-02")
+
+    assert later[0]["thread_id"] == first[0]["thread_id"]
+    assert later[0]["linked_to"]["topic_id"] == first[0]["topic_id"]
+
+    # Another process sees the thread without restarting.
+    other = TopicArchive(directory=str(tmp_path), dim=DIM)
+    assert [entry["name"] for entry in other.timeline(later[0]["topic_id"])] == ["Chip export controls", "New chip export rules"]
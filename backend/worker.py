@@ -0,0 +1,163 @@
+import os
+import socket
+import asyncio
+import logging
+import argparse
+from const import *
+from app import fetch_and_store_news, classify_sector_and_topic, summarize_topic, assemble_full_content, add_to_sector_topic_map, article_store
+from jobs.job_queue import JobQueue
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# A run moves through these stages in order. Each stage's jobs are enqueued once the previous stage has finished.
+# The API process creates each run with a single 'fetch' job (see queue_processing_run in app.py).
+STAGES = ["fetch", "classify", "summarize", "reduce", "done"]
+
+
+async def handle_fetch(job_queue, job):
+    """
+    Fetches today's articles into the article store and returns what classification needs from each.
+    """
+    hashed_articles = await fetch_and_store_news()
+    return {"articles": [
+        {
+            "hash": article_hash,
+            "title": article.get("title", "No Title"),
+            "description": article.get("description", "No Description")
+        }
+        for article_hash, article in hashed_articles.items()
+    ]}
+
+
+async def handle_classify(job_queue, job):
+    """
+    Classifies one article. Topics already assigned in this run are offered to the model so related articles group together.
+    """
+    payload = job["payload"]
+    existing_topics_llm_format = []
+    seen_topics = set()
+    for _, result in job_queue.results(job["run_id"], "classify"):
+        if (result["sector"], result["topic_name"]) not in seen_topics:
+            seen_topics.add((result["sector"], result["topic_name"]))
+            existing_topics_llm_format.append({
+                "sector": result["sector"],
+                "topic_name": result["topic_name"],
+                "summary_preview": result["topic_name"]
+            })
+
+    sector, topic_name, topic_importance = await classify_sector_and_topic(
+        payload["title"],
+        payload["description"],
+        existing_topics_llm_format
+    )
+    logging.info(f"Article '{payload['title']}' classified as '{sector}' with topic '{topic_name}' and importance '{topic_importance}'.")
+    return {"sector": sector, "topic_name": topic_name, "topic_importance": topic_importance}
+
+
+async def handle_summarize(job_queue, job):
+    payload = job["payload"]
+    # Pick up articles the API process stored after this worker started.
+    article_store.refresh()
+    topic = await summarize_topic(payload["sector"], payload["topic_name"], payload["topic_info"], article_store)
+    return {"sector": payload["sector"], "topic": topic}
+
+
+async def handle_reduce(job_queue, job):
+    """
+    Assembles FULL_CONTENT_PATH from every summarized topic in the run.
+    """
+    sector_topics = {}
+    for _, result in job_queue.results(job["run_id"], "summarize"):
+        if result["topic"]:
+            sector_topics.setdefault(result["sector"], []).append(result["topic"])
+    await assemble_full_content(sector_topics)
+    logging.info(f"Run {job['run_id']} complete. {FULL_CONTENT_PATH} generated.")
+    return {"topics": sum(len(topics) for topics in sector_topics.values())}
+
+
+JOB_HANDLERS = {
+    "fetch": handle_fetch,
+    "classify": handle_classify,
+    "summarize": handle_summarize,
+    "reduce": handle_reduce,
+}
+
+
+def next_stage_payloads(job_queue, run_id, stage):
+    """
+    Builds the jobs for the stage after `stage` from the results of `stage`.
+    """
+    if stage == "fetch":
+        return [article for _, result in job_queue.results(run_id, "fetch") for article in result["articles"]]
+    if stage == "classify":
+        sector_topic_map = {}
+        for payload, result in job_queue.results(run_id, "classify"):
+            if result["sector"] in MARKET_SECTORS:
+                add_to_sector_topic_map(sector_topic_map, result["sector"], result["topic_name"], result["topic_importance"], payload["hash"])
+        return [
+            {"sector": sector_name, "topic_name": topic_name, "topic_info": topic_info}
+            for sector_name, topics_in_sector in sector_topic_map.items()
+            for topic_name, topic_info in topics_in_sector.items()
+        ]
+    if stage == "summarize":
+        return [{}]
+    return []
+
+
+def advance_runs(job_queue):
+    """
+    Moves every run whose current stage has finished on to its next stage. Safe to call from any number of workers.
+    A run whose stage had jobs but none succeeded (e.g. its single fetch or reduce job) is marked failed.
+    Returns True if any run changed stage.
+    """
+    advanced = False
+    for run_id, stage in job_queue.active_runs():
+        if stage not in JOB_HANDLERS or not job_queue.stage_finished(run_id, stage):
+            continue
+        counts = job_queue.job_counts(run_id, stage)
+        if counts.get("failed") and not counts.get("done"):
+            if job_queue.advance_stage(run_id, stage, "failed"):
+                logging.error(f"Run {run_id} failed: every '{stage}' job failed.")
+                advanced = True
+            continue
+        next_stage = STAGES[STAGES.index(stage) + 1]
+        advanced |= job_queue.advance_stage(run_id, stage, next_stage, next_stage_payloads(job_queue, run_id, stage))
+    return advanced
+
+
+async def run_worker(kinds=None, exit_when_idle=False):
+    job_queue = JobQueue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logging.info(f"Worker {worker_id} started. Job queue: {job_queue.path}")
+
+    while True:
+        # A stage can finish with no jobs for the next one (e.g. no article fit a sector), so keep advancing
+        # until nothing moves; otherwise an idle worker could exit with a run stuck in an empty stage.
+        while advance_runs(job_queue):
+            pass
+        job = job_queue.lease(worker_id, kinds)
+        if job is None:
+            if exit_when_idle:
+                logging.info(f"Worker {worker_id} found no jobs. Exiting.")
+                return
+            await asyncio.sleep(WORKER_POLL_SECONDS)
+            continue
+
+        logging.info(f"Worker {worker_id} leased {job['kind']} job {job['job_id']} (attempt {job['attempts']}).")
+        try:
+            with job_queue.keep_alive(job["job_id"], worker_id):
+                result = await JOB_HANDLERS[job["kind"]](job_queue, job)
+            if not job_queue.complete(job["job_id"], worker_id, result):
+                logging.warning(f"Lease on job {job['job_id']} expired before completion. Result discarded.")
+        except Exception as e:
+            logging.error(f"Error running {job['kind']} job {job['job_id']}: {e}")
+            job_queue.fail(job["job_id"], worker_id, e)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Processes classification and summarization jobs queued by the API in distributed mode.")
+    parser.add_argument("--kinds", nargs="+", choices=list(JOB_HANDLERS), help="Only lease jobs of these kinds.")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Exit once no jobs are available instead of polling.")
+    args = parser.parse_args()
+
+    asyncio.run(run_worker(args.kinds, args.exit_when_idle))
@@ -20,6 +20,21 @@ export interface TopicData {
     sources: SourceData[]; // Array of source objects that contributed to this topic
     urls: string[]; // Array of URLs corresponding to the sources
     importance: number; // Importance score from backend (1-10)
+    topicId?: string; // Archive ID of this topic, used to request its timeline
+    threadId?: string; // Shared by every archived topic covering the same ongoing story
+}
+
+// Interface for a single entry in a topic's timeline (/api/topics/<topicId>/timeline)
+export interface TopicTimelineEntry {
+    topic_id: string;
+    thread_id: string;
+    linked_to: { topic_id: string; score: number } | null;
+    date: string; // YYYY-MM-DD of the run that produced this topic
+    sector: string;
+    name: string;
+    description: string;
+    importance: number;
+    urls: string[];
 }
 
 // Interface for a Sector's data